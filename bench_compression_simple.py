@@ -0,0 +1,116 @@
+"""
+Сравнение режимов сжатия эмбеддингов: память и recall@k
+
+Эталон - точный поиск по float32. Для каждого режима считаем:
+- сколько памяти занимает сжатое представление (точные float32 для пересчёта
+  в ChromaDB с этим режимом лежат на диске, в памяти остаются только коды);
+- recall@k первого прохода (только сжатые векторы);
+- recall@k после точного float32 пересчёта кандидатов.
+
+Запросы - отложенные векторы из коллекции (или из --queries-file через модель).
+"""
+import argparse
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+from config_simple import get_settings
+from quantization_simple import CompressedIndex, COMPRESSION_MODES
+
+
+def load_collection_embeddings(settings):
+    from chroma_db_simple import ChromaDB
+
+    db = ChromaDB(settings.CHROMA_DB_PATH, settings.COLLECTION_NAME)
+    data = db.collection.get(include=["embeddings"])
+    return data["ids"], np.asarray(data["embeddings"], dtype=np.float32)
+
+
+def synthetic_embeddings(n: int, dim: int, seed: int = 0):
+    """Случайные нормированные векторы с низкоранговой структурой (для прогонов без БД)"""
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((64, dim)).astype(np.float32)
+    emb = rng.standard_normal((n, 64)).astype(np.float32) @ basis
+    emb += 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    return [f"chunk{i}" for i in range(n)], emb
+
+
+def recall_at_k(found, truth) -> float:
+    return len(set(found) & set(truth)) / len(truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память и recall@k для сжатых эмбеддингов")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="Сколько векторов отложить как запросы")
+    parser.add_argument("--queries-file", type=str, default=None, help="Файл с вопросами (по одному на строку)")
+    parser.add_argument("--dim", type=int, default=None, help="Размерность для truncate/pca")
+    parser.add_argument("--candidates", type=int, default=None, help="Кандидатов для точного пересчёта")
+    parser.add_argument("--synthetic", type=int, default=0, help="Сгенерировать N случайных векторов вместо БД")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    dim = args.dim or settings.EMBEDDING_COMPRESSED_DIM
+    candidates = args.candidates or settings.RESCORE_CANDIDATES
+
+    if args.synthetic:
+        ids, emb = synthetic_embeddings(args.synthetic, 1024)
+    else:
+        ids, emb = load_collection_embeddings(settings)
+    if len(ids) == 0:
+        print("Collection is empty")
+        return
+
+    if args.queries_file:
+        from embeddings_simple import get_embedding_model
+
+        with open(args.queries_file, encoding="utf-8") as f:
+            questions = [ln.strip() for ln in f if ln.strip()]
+        queries = np.asarray(get_embedding_model().embed(questions), dtype=np.float32)
+    else:
+        # отложенные векторы: убираем их из корпуса, чтобы запрос не находил сам себя
+        rng = np.random.default_rng(42)
+        held_out = rng.choice(len(ids), size=min(args.queries, len(ids) // 2), replace=False)
+        mask = np.ones(len(ids), dtype=bool)
+        mask[held_out] = False
+        queries = emb[held_out]
+        ids = [i for i, keep in zip(ids, mask) if keep]
+        emb = emb[mask]
+
+    k = min(args.k, len(ids))
+    id_to_row = {id_val: row for row, id_val in enumerate(ids)}
+
+    exact_scores = queries @ emb.T
+    truth = [[ids[i] for i in np.argsort(-row)[:k]] for row in exact_scores]
+
+    print(f"Vectors: {len(ids)} x {emb.shape[1]}, queries: {len(queries)}, k={k}, candidates={candidates}")
+    print(f"{'mode':<10}{'RAM bytes':>14}{'saved':>10}{'recall@k 1st':>15}{'recall@k rescored':>20}")
+    print(f"{'float32':<10}{emb.nbytes:>14}{'0%':>10}{1.0:>15.3f}{1.0:>20.3f}")
+
+    for mode in COMPRESSION_MODES:
+        if mode == "none":
+            continue
+        index = CompressedIndex(mode, dim=dim)
+        index.add(ids, emb)
+
+        first_pass, rescored = [], []
+        for q, true_ids in zip(queries, truth):
+            cand_ids, _ = index.search(q, max(candidates, k))
+            first_pass.append(recall_at_k(cand_ids[:k], true_ids))
+
+            rows = np.array([id_to_row[c] for c in cand_ids])
+            order = np.argsort(-(emb[rows] @ q))[:k]
+            rescored.append(recall_at_k([cand_ids[i] for i in order], true_ids))
+
+        saved = 1.0 - index.nbytes() / index.float32_nbytes()
+        print(
+            f"{mode:<10}{index.nbytes():>14}{saved:>10.0%}"
+            f"{np.mean(first_pass):>15.3f}{np.mean(rescored):>20.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Скорость вычисления эмбеддингов (чанков в секунду) в зависимости от числа процессов
+
+    python bench_embeddings_simple.py --processes 1 2 4 8 --pdf-dir data/pdfs
+"""
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+
+logging.basicConfig(level=logging.WARNING)
+
+import torch
+
+from embeddings_simple import EmbeddingModel
+from pdf_parser_simple import parse_pdf
+from page_cache_simple import PageCache
+
+
+def load_texts(pdf_dir: str, limit: int, chunk_size: int):
+    texts = []
+    if pdf_dir and Path(pdf_dir).exists():
+        cache = PageCache()
+        for pdf_file in sorted(Path(pdf_dir).glob("*.pdf")):
+            texts.extend(parse_pdf(str(pdf_file), chunk_size, cache=cache).texts)
+            if len(texts) >= limit:
+                break
+    if not texts:
+        # синтетические чанки примерно того же размера, что и в конспектах
+        sentence = "Линейная регрессия минимизирует среднеквадратичную ошибку на обучающей выборке. "
+        texts = [(f"{i}. " + sentence * (chunk_size // len(sentence) + 1))[:chunk_size] for i in range(limit)]
+    return texts[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Чанков в секунду vs число процессов")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=0, help="Потоков на процесс (0 - cpu_count // processes)")
+    parser.add_argument("--pdf-dir", type=str, default="data/pdfs")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--model", type=str, default="BAAI/bge-m3")
+    args = parser.parse_args()
+
+    texts = load_texts(args.pdf_dir, args.chunks, args.chunk_size)
+    # lazy: при прогонах с пулом копия модели в этом процессе не нужна
+    model = EmbeddingModel(args.model, lazy=True)
+    print(f"Chunks: {len(texts)}, CPUs: {os.cpu_count()}")
+    print(f"{'processes':>10}{'threads':>10}{'seconds':>10}{'chunks/s':>12}{'speedup':>10}")
+
+    baseline = None
+    for n in args.processes:
+        threads = args.threads or max((os.cpu_count() or 1) // n, 1)
+        model.start_pool(n, threads)
+        if n <= 1:
+            threads = torch.get_num_threads()  # без пула - модель в этом процессе
+        # прогрев: загрузка реплик модели не должна попадать в замер
+        model.embed_array(texts[: max(n, 1) * 4])
+
+        start = time.perf_counter()
+        model.embed_array(texts)
+        elapsed = time.perf_counter() - start
+        model.stop_pool()
+
+        rate = len(texts) / elapsed
+        baseline = baseline or rate
+        print(f"{n:>10}{threads:>10}{elapsed:>10.2f}{rate:>12.1f}{rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Пиковая память и время индексирования: словарь на чанк vs ChunkBatch
+
+Корпус синтетический (страницы случайного текста), эмбеддинги по умолчанию -
+случайные float32 той же размерности, что у bge-m3, чтобы измерять именно
+накладные расходы структур данных. --model считает настоящие эмбеддинги,
+--store пишет результат во временную ChromaDB.
+
+    python bench_indexing_simple.py --files 200 --pages 100
+"""
+import argparse
+import gc
+import logging
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+
+from chunk_batch_simple import ChunkBatch
+from pdf_parser_simple import chunk_pages
+
+_WORDS = ["линейная", "регрессия", "градиент", "функция", "потерь", "модель", "данные", "признак", "матрица"]
+
+
+def make_corpus(files: int, pages: int, page_chars: int):
+    rng = random.Random(0)
+    corpus = []
+    for f in range(files):
+        file_pages = []
+        for p in range(1, pages + 1):
+            words, size = [], 0
+            while size < page_chars:
+                word = rng.choice(_WORDS)
+                words.append(word)
+                size += len(word) + 1
+            file_pages.append({"page_index": p, "text": " ".join(words) + f"\n{p}", "logical_page": p})
+        corpus.append((f"lecture_{f:04d}.pdf", file_pages))
+    return corpus
+
+
+class FakeEmbedder:
+    """Случайные нормированные векторы вместо модели"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.rng = np.random.default_rng(0)
+
+    def embed_array(self, texts):
+        emb = self.rng.standard_normal((len(texts), self.dim), dtype=np.float32)
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+        return emb
+
+    def embed(self, texts):
+        return self.embed_array(texts).tolist()
+
+
+def legacy_path(corpus, embedder, chunk_size, chunk_overlap, db):
+    """Как было: словарь на чанк, embed() -> list[list[float]], add_chunks копирует в списки"""
+    all_chunks = []
+    for file_name, pages in corpus:
+        all_chunks.extend(chunk_pages(pages, file_name, chunk_size, chunk_overlap).to_dicts())
+
+    texts = [chunk["text"] for chunk in all_chunks]
+    embeddings = embedder.embed(texts)
+    for chunk, embedding in zip(all_chunks, embeddings):
+        chunk["embedding"] = embedding
+
+    if db is not None:
+        db.add_chunks(all_chunks)
+        return len(all_chunks)
+
+    # то, что add_chunks собирает перед collection.add
+    ids, documents, metadatas, embeddings = [], [], [], []
+    for chunk in all_chunks:
+        ids.append(chunk["id"])
+        documents.append(chunk["text"])
+        metadatas.append({"file": chunk.get("file", ""), "page": chunk.get("page", 0)})
+        embeddings.append(chunk["embedding"])
+    return len(all_chunks)
+
+
+def batch_path(corpus, embedder, chunk_size, chunk_overlap, db, slice_size=4096):
+    """ChunkBatch: колонки NumPy, эмбеддинги float32, списки только по срезу при записи"""
+    batch = ChunkBatch.concat(
+        [chunk_pages(pages, file_name, chunk_size, chunk_overlap) for file_name, pages in corpus]
+    )
+    batch.embeddings = embedder.embed_array(batch.texts)
+
+    if db is not None:
+        db.add_batch(batch, slice_size=slice_size)
+        return len(batch)
+
+    # то, что add_batch собирает на каждый срез перед collection.add
+    for start in range(0, len(batch), slice_size):
+        stop = min(start + slice_size, len(batch))
+        batch.ids(start, stop)
+        batch.texts[start:stop]
+        batch.metadatas(start, stop)
+        batch.embeddings[start:stop].tolist()
+    return len(batch)
+
+
+def measure(name, fn, *args, make_db=lambda: None):
+    # время и память - в разных прогонах: tracemalloc сильно замедляет выделения памяти
+    gc.collect()
+    start = time.perf_counter()
+    n = fn(*args, make_db())
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    fn(*args, make_db())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<8}{n:>10}{elapsed:>10.2f}{peak / 2**20:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память и время: dict на чанк vs ChunkBatch")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-chars", type=int, default=2500)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--model", type=str, default=None, help="Считать эмбеддинги настоящей моделью")
+    parser.add_argument("--store", action="store_true", help="Писать во временную ChromaDB")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.files, args.pages, args.page_chars)
+    if args.model:
+        from embeddings_simple import EmbeddingModel
+
+        embedder = EmbeddingModel(args.model)
+    else:
+        embedder = FakeEmbedder(args.dim)
+
+    print(f"{'path':<8}{'chunks':>10}{'seconds':>10}{'peak MiB':>14}")
+    for name, fn in (("dicts", legacy_path), ("batch", batch_path)):
+        make_db = lambda: None
+        if args.store:
+            from chroma_db_simple import ChromaDB
+
+            make_db = lambda: ChromaDB(tempfile.mkdtemp(prefix="bench_chroma_"), f"bench_{name}")
+        measure(name, fn, corpus, embedder, args.chunk_size, args.chunk_overlap, make_db=make_db)
+
+
+if __name__ == "__main__":
+    main()
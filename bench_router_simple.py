@@ -0,0 +1,75 @@
+"""
+Сравнение задержек: один LLM endpoint vs LLMRouter (hedging + circuit breaker)
+
+    # два mock-сервера: у первого 10% запросов со всплеском до 5 с, второй падает в 30% случаев
+    python mock_llm_simple.py --port 8101 --latency 0.3 --tokens 20 --spike-rate 0.1 --spike-latency 5
+    python mock_llm_simple.py --port 8102 --latency 0.4 --tokens 20 --error-rate 0.3
+    python bench_router_simple.py http://127.0.0.1:8101/chat/completions http://127.0.0.1:8102/chat/completions
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+logging.basicConfig(level=logging.WARNING)
+
+from llm_simple import LLMClient, LLMError
+from llm_router_simple import LLMRouter
+from loadtest_simple import percentile
+
+
+async def run(client, requests: int, concurrency: int, timeout: float):
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.generate("system", "question", timeout=timeout)
+                latencies.append(time.perf_counter() - start)
+            except LLMError:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, errors
+
+
+def report(name: str, latencies, errors: int):
+    print(
+        f"{name:<8} ok={len(latencies):<5} errors={errors:<5} "
+        f"p50={percentile(latencies, 50):.3f}s "
+        f"p95={percentile(latencies, 95):.3f}s "
+        f"p99={percentile(latencies, 99):.3f}s"
+    )
+
+
+async def main_async(args):
+    single = LLMClient("mock", "mock", base_url=args.urls[0])
+    report("single", *await run(single, args.requests, args.concurrency, args.timeout))
+
+    router = LLMRouter(
+        [LLMClient("mock", "mock", base_url=url) for url in args.urls],
+        hedge_percentile=args.hedge_percentile,
+        hedge_min_delay=args.hedge_min_delay,
+    )
+    report("router", *await run(router, args.requests, args.concurrency, args.timeout))
+    print(json.dumps(router.stats(), indent=2, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Один endpoint vs LLMRouter")
+    parser.add_argument("urls", nargs="+", help="URL'ы /chat/completions (первый - для одиночного прогона)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--hedge-percentile", type=float, default=95.0)
+    parser.add_argument("--hedge-min-delay", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
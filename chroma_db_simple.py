@@ -2,20 +2,45 @@
 
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 import logging
 
+import numpy as np
+
 from embeddings_simple import get_embedding_model  # уже обсуждали
+from deadline_simple import Deadline, DeadlineExceeded
+from quantization_simple import CompressedIndex
+from chunk_batch_simple import ChunkBatch
 
 logger = logging.getLogger(__name__)
 
+# Chroma требует вектор на каждую запись (иначе считает его своей моделью по умолчанию).
+# При сжатии векторы живут в CompressedIndex, а в Chroma - одна координата вместо 1024 float32
+_PLACEHOLDER_EMBEDDING = [1.0]
+
 
 class ChromaDB:
     """Простой клиент для ChromaDB"""
 
-    def __init__(self, db_path: str = "data/chroma_db", collection_name: str = "lectures"):
+    def __init__(
+        self,
+        db_path: str = "data/chroma_db",
+        collection_name: str = "lectures",
+        compression: str = "none",
+        compressed_dim: int = 256,
+        rescore_candidates: int = 50,
+    ):
+        """
+        compression - сжатое представление для первого прохода поиска
+        ("none", "float16", "int8", "truncate", "pca"); кандидаты
+        (rescore_candidates штук) затем пересчитываются по точным float32,
+        которые лежат на диске рядом со сжатым индексом, а не в Chroma.
+        Смена режима сжатия требует переиндексирования с --clear.
+        """
         self.db_path = db_path
         self.collection_name = collection_name
+        self.rescore_candidates = rescore_candidates
 
         # НОВЫЙ способ инициализации клиента
         self.client = chromadb.PersistentClient(
@@ -25,6 +50,51 @@ class ChromaDB:
         self.collection = None
         self._init_collection()
 
+        self.compressed_index: Optional[CompressedIndex] = None
+        # полные векторы в Chroma: без сжатия или в коллекции, созданной до его включения
+        self._vectors_in_chroma = compression == "none"
+        if compression != "none":
+            self.compressed_index = CompressedIndex(
+                compression,
+                dim=compressed_dim,
+                path=str(Path(db_path) / f"{collection_name}_{compression}.npz"),
+            )
+            self._load_compressed_index()
+
+    def _load_compressed_index(self):
+        """
+        Загрузить сжатый индекс с диска или построить его по эмбеддингам из Chroma.
+
+        Файл, не совпадающий с коллекцией по числу векторов (остался после --clear
+        или индексирования с выключенным сжатием), перестраивается. Построить индекс
+        можно только по коллекции, проиндексированной без сжатия (с полными векторами).
+        """
+        count = self.get_count()
+        if count > 0:
+            sample = self.collection.get(limit=1, include=["embeddings"])
+            self._vectors_in_chroma = len(sample["embeddings"][0]) > len(_PLACEHOLDER_EMBEDDING)
+            if self._vectors_in_chroma:
+                logger.warning(
+                    "Collection still stores float32 vectors; re-index with --clear to keep them only on disk"
+                )
+        if self.compressed_index.load():
+            if len(self.compressed_index) == count:
+                return
+            logger.info(
+                f"Compressed index is stale ({len(self.compressed_index)} vectors, "
+                f"collection has {count}), rebuilding"
+            )
+        self.compressed_index.reset()
+        if count == 0:
+            return
+        if not self._vectors_in_chroma:
+            logger.error("Compressed index is missing or out of sync with the collection; re-index with --clear")
+            return
+        logger.info(f"Building {self.compressed_index.mode} index from collection...")
+        data = self.collection.get(include=["embeddings"])
+        self.compressed_index.add(data["ids"], data["embeddings"])
+        self.compressed_index.save()
+
     def _init_collection(self):
         """Получить или создать коллекцию"""
         try:
@@ -52,15 +122,20 @@ class ChromaDB:
             if "embedding" in chunk:
                 embeddings.append(chunk["embedding"])
 
+        # upsert, а не add: add молча пропускает существующие id, и повторное
+        # индексирование оставило бы старые векторы (и рассинхрон со сжатым индексом)
         if embeddings:
-            self.collection.add(
+            self.collection.upsert(
                 ids=ids,
                 documents=documents,
-                embeddings=embeddings,  # тут уже должны быть list[list[float]]
+                embeddings=self._chroma_embeddings(embeddings),  # тут уже должны быть list[list[float]]
                 metadatas=metadatas,
             )
+            if self.compressed_index is not None:
+                self.compressed_index.add(ids, embeddings)
+                self.compressed_index.save()
         else:
-            self.collection.add(
+            self.collection.upsert(
                 ids=ids,
                 documents=documents,
                 metadatas=metadatas,
@@ -68,12 +143,58 @@ class ChromaDB:
 
         logger.info(f"Added {len(chunks)} chunks to collection")
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Поиск по тем же эмбеддингам, что и при индексации."""
+    def add_batch(self, batch: ChunkBatch, slice_size: int = 4096):
+        """
+        Добавить колоночную пачку чанков (с batch.embeddings).
+
+        Chroma принимает эмбеддинги только как list[list[float]], поэтому в списки
+        переводится по срезу из slice_size чанков за раз - пиковая память не растёт
+        с размером корпуса (и не упираемся в max_batch_size Chroma).
+        """
+        if batch.embeddings is None:
+            raise ValueError("ChunkBatch has no embeddings")
+
+        for start in range(0, len(batch), slice_size):
+            stop = min(start + slice_size, len(batch))
+            # upsert: повторное индексирование перезаписывает чанки с теми же id
+            self.collection.upsert(
+                ids=batch.ids(start, stop),
+                documents=batch.texts[start:stop],
+                embeddings=self._chroma_embeddings(batch.embeddings[start:stop]),
+                metadatas=batch.metadatas(start, stop),
+            )
+
+        if self.compressed_index is not None:
+            # одним вызовом: add() склеивает массивы, по срезам это было бы O(N^2)
+            self.compressed_index.add(batch.ids(), batch.embeddings)
+            self.compressed_index.save()
+
+        logger.info(f"Added {len(batch)} chunks to collection")
+
+    def _chroma_embeddings(self, embeddings) -> List[List[float]]:
+        """Что писать в Chroma: полные векторы или заглушки (при сжатии)"""
+        if self._vectors_in_chroma:
+            return embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+        return [_PLACEHOLDER_EMBEDDING] * len(embeddings)
+
+    def search(self, query: str, top_k: int = 5, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """
+        Поиск по тем же эмбеддингам, что и при индексации.
+
+        deadline - бюджет времени запроса; если он истёк между этапами
+        (embed -> search), бросается DeadlineExceeded.
+        """
         try:
+            if deadline is not None:
+                deadline.check("embed")
             embedding_model = get_embedding_model()
             query_emb = embedding_model.embed_query(query)
 
+            if deadline is not None:
+                deadline.check("search")
+            if self.compressed_index is not None and len(self.compressed_index) > 0:
+                return self._search_compressed(query_emb, top_k)
+
             results = self.collection.query(
                 query_embeddings=[query_emb],
                 n_results=top_k,
@@ -92,15 +213,58 @@ class ChromaDB:
                         }
                     )
             return output
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Search error: {e}")
             return []
 
+    def _search_compressed(self, query_emb: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """Первый проход по сжатому индексу, затем точный float32 пересчёт кандидатов"""
+        candidate_ids, _ = self.compressed_index.search(
+            query_emb, max(self.rescore_candidates, top_k)
+        )
+        if not candidate_ids:
+            return []
+
+        exact = self.compressed_index.rescore(candidate_ids, query_emb)
+        order = np.argsort(-exact)[:top_k]
+        top_ids = [candidate_ids[i] for i in order]
+
+        # из Chroma - только тексты и метаданные (векторы не читаются)
+        got = self.collection.get(ids=top_ids, include=["documents", "metadatas"])
+        by_id = {id_val: i for i, id_val in enumerate(got["ids"])}
+
+        output: List[Dict[str, Any]] = []
+        for id_val, i in zip(top_ids, order):
+            j = by_id.get(id_val)
+            if j is None:
+                continue
+            output.append(
+                {
+                    "id": id_val,
+                    "text": got["documents"][j],
+                    # cosine distance, как в коллекции с hnsw:space=cosine
+                    "distance": float(1.0 - exact[i]),
+                    "file": got["metadatas"][j].get("file", ""),
+                    "page": got["metadatas"][j].get("page", 0),
+                }
+            )
+        return output
+
+    def compression_stats(self) -> Dict[str, Any]:
+        if self.compressed_index is None:
+            return {"mode": "none"}
+        return self.compressed_index.stats()
+
     def clear(self):
         """Очистить коллекцию (проще — удалить и пересоздать)"""
         try:
             self.client.delete_collection(name=self.collection_name)
             self._init_collection()
+            if self.compressed_index is not None:
+                self.compressed_index.reset()
+                self._vectors_in_chroma = False
             logger.info("Collection cleared")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")
@@ -0,0 +1,138 @@
+# chunk_batch_simple.py
+"""
+Колоночное представление чанков для индексирования
+
+Вместо словаря на каждый чанк - параллельные колонки:
+тексты (list[str]), индексы файлов и номера страниц (NumPy int32),
+эмбеддинги (NumPy float32 [N, D]). Имена файлов хранятся один раз (sys.intern),
+id чанков собираются только в момент записи в базу.
+"""
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class ChunkBatch:
+    """Пачка чанков в колоночном виде"""
+
+    def __init__(
+        self,
+        texts: List[str],
+        file_names: List[str],
+        file_idx: np.ndarray,
+        pages: np.ndarray,
+        pdf_page_index: np.ndarray,
+        chunk_idx: np.ndarray,
+        embeddings: Optional[np.ndarray] = None,
+    ):
+        self.texts = texts
+        self.file_names = file_names  # уникальные имена файлов; file_idx ссылается сюда
+        self.file_idx = file_idx
+        self.pages = pages  # логический номер страницы (для цитат)
+        self.pdf_page_index = pdf_page_index  # физический индекс страницы в PDF
+        self.chunk_idx = chunk_idx  # номер чанка на странице
+        self.embeddings = embeddings  # float32 [N, D] или None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def empty(cls) -> "ChunkBatch":
+        return ChunkBatchBuilder("").build()
+
+    @classmethod
+    def concat(cls, batches: List["ChunkBatch"]) -> "ChunkBatch":
+        """Склеить пачки (например, по одной на PDF) в одну"""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+
+        texts: List[str] = []
+        file_names: List[str] = []
+        file_idx = []
+        for batch in batches:
+            texts.extend(batch.texts)
+            file_idx.append(batch.file_idx + len(file_names))
+            file_names.extend(batch.file_names)
+
+        embeddings = None
+        if all(b.embeddings is not None for b in batches):
+            embeddings = np.concatenate([b.embeddings for b in batches])
+
+        return cls(
+            texts,
+            file_names,
+            np.concatenate(file_idx).astype(np.int32),
+            np.concatenate([b.pages for b in batches]),
+            np.concatenate([b.pdf_page_index for b in batches]),
+            np.concatenate([b.chunk_idx for b in batches]),
+            embeddings,
+        )
+
+    # --- представления для ChromaDB (строятся по срезу, а не для всей пачки сразу) ---
+
+    def ids(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """id вида file_pageIndex_chunkIndex (как и раньше)"""
+        stop = len(self) if stop is None else stop
+        return [
+            f"{self.file_names[f]}_page{p}_chunk{c}"
+            for f, p, c in zip(
+                self.file_idx[start:stop].tolist(),
+                self.pdf_page_index[start:stop].tolist(),
+                self.chunk_idx[start:stop].tolist(),
+            )
+        ]
+
+    def metadatas(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        stop = len(self) if stop is None else stop
+        return [
+            {"file": self.file_names[f], "page": p}
+            for f, p in zip(self.file_idx[start:stop].tolist(), self.pages[start:stop].tolist())
+        ]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Старый формат: словарь на чанк (для отладки и обратной совместимости)"""
+        chunks = []
+        for i, (id_val, meta) in enumerate(zip(self.ids(), self.metadatas())):
+            chunk = {
+                "id": id_val,
+                "text": self.texts[i],
+                "file": meta["file"],
+                "page": meta["page"],
+                "pdf_page_index": int(self.pdf_page_index[i]),
+            }
+            if self.embeddings is not None:
+                chunk["embedding"] = self.embeddings[i].tolist()
+            chunks.append(chunk)
+        return chunks
+
+
+class ChunkBatchBuilder:
+    """Накопление чанков одного файла без словаря на каждый чанк"""
+
+    def __init__(self, file_name: str):
+        self.file_name = sys.intern(file_name)
+        self.texts: List[str] = []
+        # array("i") хранит числа плотно, без объекта Python на каждое значение
+        self.pages = array("i")
+        self.pdf_page_index = array("i")
+        self.chunk_idx = array("i")
+
+    def add(self, text: str, page: int, pdf_page_index: int, chunk_idx: int):
+        self.texts.append(text)
+        self.pages.append(page)
+        self.pdf_page_index.append(pdf_page_index)
+        self.chunk_idx.append(chunk_idx)
+
+    def build(self) -> ChunkBatch:
+        n = len(self.texts)
+        return ChunkBatch(
+            self.texts,
+            [self.file_name] if n else [],
+            np.zeros(n, dtype=np.int32),
+            np.frombuffer(self.pages, dtype=np.int32).copy(),
+            np.frombuffer(self.pdf_page_index, dtype=np.int32).copy(),
+            np.frombuffer(self.chunk_idx, dtype=np.int32).copy(),
+        )
@@ -2,7 +2,7 @@
 Конфигурация (упрощённая версия)
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -12,6 +12,16 @@ class Settings(BaseSettings):
     LLM_API_KEY: str
     LLM_PROVIDER: str = "openai"  # openai или anthropic
     LLM_MODEL: str = "gpt-4-turbo-preview"
+    # OpenAI-совместимый endpoint; для нагрузочных тестов - mock_llm_simple.py
+    LLM_BASE_URL: str = "https://api.perplexity.ai/chat/completions"
+    
+    # Несколько LLM endpoint'ов (JSON): [{"url": ..., "model": ..., "api_key": ..., "name": ...}]
+    # Если задано - используется LLMRouter вместо одного LLM_BASE_URL
+    LLM_ENDPOINTS: List[Dict[str, Any]] = []
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_BREAKER_FAILURES: int = 3
+    LLM_BREAKER_COOLDOWN: float = 30.0
     
     # Поиск в интернете
     SEARCH_ENABLED: bool = False
@@ -23,10 +33,37 @@ class Settings(BaseSettings):
     RETRIEVAL_TOP_K: int = 5
     RETRIEVAL_THRESHOLD: float = 0.3
     
+    # Бюджет времени на /api/ask (секунды)
+    ASK_DEADLINE_SECONDS: float = 25.0
+    # Если на LLM остаётся меньше - отдаём только цитаты без ответа LLM
+    LLM_MIN_BUDGET_SECONDS: float = 3.0
+    
+    # Профилирование запросов: заголовок X-Profile: <PROFILE_SECRET> или случайная доля запросов
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SECRET: Optional[str] = None  # без секрета заголовок игнорируется
+    PROFILE_MIN_INTERVAL_SECONDS: float = 10.0  # не чаще одного профиля запроса за интервал
+    PROFILE_MAX_FILES: int = 100  # старые профили сверх лимита удаляются
+    PROFILE_DIR: str = "data/profiles"
+    
+    # Многопроцессное вычисление эмбеддингов при индексировании (1 - без пула)
+    EMBED_PROCESSES: int = 1
+    EMBED_THREADS_PER_PROCESS: int = 0  # 0 - cpu_count // EMBED_PROCESSES
+    
+    # Кэш извлечённого текста страниц PDF (перечанковка без pdfplumber)
+    PAGE_CACHE_ENABLED: bool = True
+    PAGE_CACHE_DIR: str = "data/page_cache"
+    
     # ChromaDB
     CHROMA_DB_PATH: str = "data/chroma_db"
     COLLECTION_NAME: str = "lectures"
     
+    # Сжатые эмбеддинги для первого прохода поиска:
+    # none / float16 / int8 / truncate / pca
+    EMBEDDING_COMPRESSION: str = "none"
+    EMBEDDING_COMPRESSED_DIM: int = 256  # для truncate и pca
+    RESCORE_CANDIDATES: int = 50  # сколько кандидатов пересчитывать точно (float32)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,47 @@
+# deadline_simple.py
+"""
+Бюджет времени на запрос и счётчики деградации
+"""
+import time
+from collections import Counter
+from typing import Dict
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени запроса исчерпан; stage - этап, до которого не дошли"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before stage '{stage}'")
+        self.stage = stage
+
+
+class Deadline:
+    """Дедлайн запроса: сколько секунд осталось на все этапы (embed, search, LLM)"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось (не меньше нуля)"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self, stage: str):
+        """Бросить DeadlineExceeded, если на этап `stage` времени не осталось"""
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+
+# Сколько раз срабатывал каждый путь деградации (отдаётся в /api/stats)
+degradation_counters: Counter = Counter()
+
+
+def record_degradation(reason: str):
+    degradation_counters[reason] += 1
+
+
+def get_degradation_stats() -> Dict[str, int]:
+    return dict(degradation_counters)
@@ -1,30 +1,138 @@
 # embeddings_simple.py
 
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional
 import logging
-import numpy as np  
+import multiprocessing
+import os
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Реплика модели в процессе-воркере пула (см. EmbeddingModel.start_pool)
+_worker_model = None
+# Ошибка загрузки модели в воркере: если initializer бросит исключение,
+# Pool будет бесконечно перезапускать воркеры и map() зависнет
+_worker_error: Optional[str] = None
+
+
+def _init_worker(model_name: str, threads: int, ready):
+    """Инициализация воркера: свой лимит потоков torch и своя копия модели; итог - в очередь ready"""
+    global _worker_model, _worker_error
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+        _worker_model = SentenceTransformer(model_name)
+    except Exception as e:
+        _worker_error = f"{type(e).__name__}: {e}"
+    ready.put(_worker_error)
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    if _worker_model is None:
+        raise RuntimeError(f"Embedding worker failed to load model: {_worker_error}")
+    return _worker_model.encode(
+        texts,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
 
 class EmbeddingModel:
     """Модель для создания эмбеддингов"""
 
-    def __init__(self, model_name: str = "BAAI/bge-m3"):
-        logger.info(f"Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = "BAAI/bge-m3", lazy: bool = False):
+        """
+        lazy=True - не загружать модель в этом процессе до первого обращения.
+        Нужно при индексировании с пулом: эмбеддинги считают воркеры, и копия
+        модели в родительском процессе была бы лишней.
+        """
+        self.model_name = model_name
+        self._model = None
+        self._pool = None
+        self._pool_size = 0
+        if not lazy:
+            self._load()
+
+    def _load(self):
+        logger.info(f"Loading model: {self.model_name}")
+        self._model = SentenceTransformer(self.model_name)
         logger.info("Model loaded!")
 
+    @property
+    def model(self) -> SentenceTransformer:
+        if self._model is None:
+            self._load()
+        return self._model
+
+    def start_pool(self, num_processes: int, threads_per_process: Optional[int] = None):
+        """
+        Запустить пул процессов с репликами модели для массового embed().
+
+        Для CPU: torch плохо загружает много ядер на коротких последовательностях,
+        несколько процессов с небольшим числом потоков каждый работают быстрее.
+        threads_per_process по умолчанию - cpu_count // num_processes.
+        """
+        self.stop_pool()
+        if num_processes <= 1:
+            return
+        if not threads_per_process:
+            threads_per_process = max((os.cpu_count() or 1) // num_processes, 1)
+
+        logger.info(f"Starting embedding pool: {num_processes} processes x {threads_per_process} threads")
+        # spawn: fork после инициализации torch может зависнуть
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Queue()
+        self._pool = ctx.Pool(
+            num_processes,
+            initializer=_init_worker,
+            initargs=(self.model_name, threads_per_process, ready),
+        )
+        self._pool_size = num_processes
+
+        # проверка здоровья: дождаться загрузки модели во всех воркерах и поднять ошибку здесь
+        errors = [error for error in (ready.get() for _ in range(num_processes)) if error is not None]
+        if errors:
+            self._pool.terminate()
+            self._pool = None
+            self._pool_size = 0
+            raise RuntimeError(f"Embedding worker failed to load model: {errors[0]}")
+
+    def stop_pool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = 0
+
+    def _encode_multiprocess(self, texts: List[str]) -> np.ndarray:
+        # несколько шардов на процесс, чтобы выровнять нагрузку; map сохраняет порядок
+        n_shards = min(self._pool_size * 4, len(texts))
+        bounds = np.linspace(0, len(texts), n_shards + 1, dtype=int)
+        shards = [texts[bounds[i] : bounds[i + 1]] for i in range(n_shards)]
+        return np.concatenate(self._pool.map(_encode_shard, shards))
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Создать эмбеддинги для текстов: np.ndarray float32 [N, D]"""
+        if self._pool is not None:
+            # с пулом - всё через воркеры, даже маленькие пачки: иначе в этом процессе
+            # загрузилась бы ещё одна копия модели
+            if not texts:
+                return np.empty((0, 0), dtype=np.float32)
+            emb = self._encode_multiprocess(texts)
+        else:
+            emb = self.model.encode(
+                texts,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        return np.asarray(emb, dtype=np.float32)
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         """Создать эмбеддинги для текстов"""
-        emb = self.model.encode(
-            texts,
-            convert_to_numpy=True,   
-            normalize_embeddings=True  
-        )
         # emb: np.ndarray [N, D]  переводим в list[list[float]]
-        return emb.tolist()
+        return self.embed_array(texts).tolist()
 
     def embed_query(self, query: str) -> List[float]:
         """Создать эмбеддинг для запроса"""
@@ -39,8 +147,9 @@ class EmbeddingModel:
 _embedding_model = None
 
 
-def get_embedding_model():
+def get_embedding_model(lazy: bool = False):
+    """Глобальная модель; lazy учитывается только при первом вызове"""
     global _embedding_model
     if _embedding_model is None:
-        _embedding_model = EmbeddingModel()
+        _embedding_model = EmbeddingModel(lazy=lazy)
     return _embedding_model
@@ -15,12 +15,18 @@ logging.basicConfig(
 from config_simple import get_settings
 from chroma_db_simple import ChromaDB
 from pdf_parser_simple import index_pdf_files
+from profiling_simple import profile_block
+from page_cache_simple import PageCache
+from embeddings_simple import get_embedding_model
 
 
 def main():
     parser = argparse.ArgumentParser(description="Индексировать PDF конспекты")
     parser.add_argument("--pdf-dir", type=str, default="data/pdfs", help="Папка с PDF")
     parser.add_argument("--clear", action="store_true", help="Очистить индекс")
+    parser.add_argument("--no-page-cache", action="store_true", help="Не использовать кэш страниц PDF")
+    parser.add_argument("--embed-processes", type=int, default=None, help="Процессов для эмбеддингов (по умолчанию EMBED_PROCESSES)")
+    parser.add_argument("--profile", action="store_true", help="Профилировать индексирование (результат в PROFILE_DIR)")
     
     args = parser.parse_args()
     
@@ -30,7 +36,10 @@ def main():
     # Инициализировать ChromaDB
     db = ChromaDB(
         db_path=settings.CHROMA_DB_PATH,
-        collection_name=settings.COLLECTION_NAME
+        collection_name=settings.COLLECTION_NAME,
+        compression=settings.EMBEDDING_COMPRESSION,
+        compressed_dim=settings.EMBEDDING_COMPRESSED_DIM,
+        rescore_candidates=settings.RESCORE_CANDIDATES,
     )
     
     # Очистить если нужно
@@ -40,14 +49,29 @@ def main():
         print("Done!")
         return
     
+    page_cache = None
+    if settings.PAGE_CACHE_ENABLED and not args.no_page_cache:
+        page_cache = PageCache(settings.PAGE_CACHE_DIR)
+    
+    # Пул процессов для эмбеддингов
+    embed_processes = args.embed_processes or settings.EMBED_PROCESSES
+    # с пулом модель считают воркеры - в этом процессе её не загружаем
+    embedding_model = get_embedding_model(lazy=embed_processes > 1)
+    embedding_model.start_pool(embed_processes, settings.EMBED_THREADS_PER_PROCESS)
+    
     # Индексировать PDF
     print(f"Indexing PDFs from {args.pdf_dir}...")
-    chunks_count = index_pdf_files(
-        args.pdf_dir,
-        db,
-        chunk_size=settings.CHUNK_SIZE,
-        chunk_overlap=settings.CHUNK_OVERLAP
-    )
+    try:
+        with profile_block("index", settings.PROFILE_DIR, enabled=args.profile, max_files=settings.PROFILE_MAX_FILES):
+            chunks_count = index_pdf_files(
+                args.pdf_dir,
+                db,
+                chunk_size=settings.CHUNK_SIZE,
+                chunk_overlap=settings.CHUNK_OVERLAP,
+                page_cache=page_cache,
+            )
+    finally:
+        embedding_model.stop_pool()
     
     count = db.get_count()
     print(f"\n✅ Success! Total chunks in database: {count}")
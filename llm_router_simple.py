@@ -0,0 +1,289 @@
+# llm_router_simple.py
+"""
+Маршрутизация запросов между несколькими OpenAI-совместимыми LLM endpoint'ами
+
+- выбор endpoint'а по медиане недавних задержек;
+- hedged-запрос: если первый не ответил за p-й перцентиль своей задержки,
+  параллельно отправляется второй на следующий endpoint, проигравший отменяется;
+- circuit breaker: после нескольких ошибок подряд endpoint выводится из ротации на время,
+  затем пропускается один пробный запрос (half-open). Ошибкой считается только
+  LLMError или отсутствие ответа от основного endpoint'а до общего таймаута; проигрыш
+  hedge-гонки - не ошибка. У отменённого проигравшего время ожидания - нижняя оценка
+  задержки ("цензурированный" замер), она учитывается только в ранжировании и только
+  если больше медианы - иначе зависший endpoint навсегда оставался бы первым.
+
+Интерфейс generate() совпадает с LLMClient.generate, поэтому роутер подставляется вместо клиента.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from llm_simple import LLMClient, LLMError, LLMTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointState:
+    """Endpoint + окно последних задержек + состояние circuit breaker"""
+
+    def __init__(self, client: LLMClient, name: str, window: int = 100):
+        self.client = client
+        self.name = name
+        # (задержка, censored): censored=True - запрос отменён, известна только нижняя оценка
+        self.samples: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # до этого момента (monotonic) endpoint выведен из ротации
+        self.probing = False  # half-open: пробный запрос уже в полёте
+        self.counters: Counter = Counter()
+
+    @property
+    def latencies(self) -> List[float]:
+        """Только настоящие замеры (по ним hedge-перцентиль и min_samples)"""
+        return [latency for latency, censored in self.samples if not censored]
+
+    def latency_percentile(self, p: float) -> Optional[float]:
+        latencies = self.latencies
+        if not latencies:
+            return None
+        return float(np.percentile(latencies, p))
+
+    def rank_latency(self) -> Optional[float]:
+        """
+        Медиана для ранжирования. Отменённый запрос, прождавший дольше медианы,
+        добавляется как замер (настоящая задержка ещё больше); более короткие
+        отмены ничего не говорят и не учитываются, иначе оценка занижается.
+        """
+        latencies = self.latencies
+        if not latencies:
+            return None
+        median = float(np.median(latencies))
+        slow = [latency for latency, censored in self.samples if censored and latency > median]
+        return float(np.median(latencies + slow)) if slow else median
+
+    def is_available(self, now: float) -> bool:
+        if now < self.open_until:
+            return False
+        # после cooldown - half-open: только один пробный запрос, остальные ждут его результата
+        return not (self.open_until and self.probing)
+
+    def acquire(self, now: float) -> bool:
+        """Занять endpoint под запрос; в half-open это и есть пробный запрос"""
+        if not self.is_available(now):
+            return False
+        if self.open_until:
+            self.probing = True
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "available": self.is_available(time.monotonic()),
+            "samples": len(self.latencies),
+            "censored_samples": len(self.samples) - len(self.latencies),
+            "p50": self.latency_percentile(50),
+            "rank_latency": self.rank_latency(),
+            "p95": self.latency_percentile(95),
+            "consecutive_failures": self.consecutive_failures,
+            "probing": self.probing,
+            **self.counters,
+        }
+
+
+class LLMRouter:
+    """Несколько LLM endpoint'ов с hedged-запросами и circuit breaker"""
+
+    def __init__(
+        self,
+        clients: List[LLMClient],
+        names: Optional[List[str]] = None,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.5,
+        min_samples: int = 10,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        """
+        hedge_percentile - после какого перцентиля задержки основного endpoint'а
+            отправлять второй запрос (пока замеров меньше min_samples - hedge_min_delay);
+        failure_threshold - сколько ошибок подряд выводят endpoint из ротации на cooldown секунд.
+        """
+        if not clients:
+            raise ValueError("LLMRouter needs at least one endpoint")
+        names = names or [client.base_url for client in clients]
+        self.endpoints = [EndpointState(client, name) for client, name in zip(clients, names)]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.counters: Counter = Counter()
+
+    @classmethod
+    def from_config(cls, endpoints: List[Dict[str, Any]], default_api_key: str, **kwargs) -> "LLMRouter":
+        """
+        endpoints - список вида [{"url": ..., "model": ..., "api_key": ..., "name": ...}],
+        api_key и name необязательны.
+        """
+        clients, names = [], []
+        for cfg in endpoints:
+            clients.append(
+                LLMClient(
+                    cfg.get("api_key") or default_api_key,
+                    cfg["model"],
+                    base_url=cfg["url"],
+                )
+            )
+            names.append(cfg.get("name") or cfg["url"])
+        return cls(clients, names, **kwargs)
+
+    # --- выбор endpoint'ов ---
+
+    def _ranked(self) -> List[EndpointState]:
+        """Доступные endpoint'ы, самые быстрые (по rank_latency) первыми"""
+        now = time.monotonic()
+        available = [ep for ep in self.endpoints if ep.is_available(now)]
+
+        def score(ep: EndpointState) -> float:
+            # без замеров - в конец (в порядке из конфига): задержку нового endpoint'а
+            # узнаем через hedge/failover, а не отдавая ему весь трафик
+            latency = ep.rank_latency()
+            return float("inf") if latency is None else latency
+
+        return sorted(available, key=score)
+
+    def _hedge_delay(self, ep: EndpointState) -> float:
+        if len(ep.latencies) < self.min_samples:
+            return self.hedge_min_delay
+        return max(ep.latency_percentile(self.hedge_percentile), self.hedge_min_delay)
+
+    # --- учёт результатов ---
+
+    def _record_success(self, ep: EndpointState, latency: float):
+        ep.samples.append((latency, False))
+        ep.consecutive_failures = 0
+        ep.open_until = 0.0
+        ep.probing = False
+        ep.counters["success"] += 1
+
+    def _record_failure(self, ep: EndpointState):
+        ep.consecutive_failures += 1
+        ep.counters["failure"] += 1
+        # неудачный пробный запрос в half-open сразу снова выводит endpoint из ротации
+        if ep.probing or ep.consecutive_failures >= self.failure_threshold:
+            ep.probing = False
+            ep.open_until = time.monotonic() + self.cooldown
+            ep.counters["breaker_opened"] += 1
+            logger.warning(f"LLM endpoint {ep.name} out of rotation for {self.cooldown:.0f}s")
+
+    async def _call(self, ep: EndpointState, system_prompt: str, user_message: str, timeout: float) -> str:
+        start = time.monotonic()
+        try:
+            result = await ep.client.generate(system_prompt, user_message, timeout=timeout)
+        except LLMError:
+            self._record_failure(ep)
+            raise
+        except asyncio.CancelledError:
+            # проигравший hedge: настоящая задержка не меньше, чем мы успели прождать
+            ep.samples.append((time.monotonic() - start, True))
+            ep.counters["cancelled"] += 1
+            # пробный запрос ничего не показал - следующий запрос снова будет пробным
+            ep.probing = False
+            raise
+        self._record_success(ep, time.monotonic() - start)
+        return result
+
+    # --- основной метод ---
+
+    async def generate(self, system_prompt: str, user_message: str, timeout: Optional[float] = None) -> str:
+        """Сгенерировать ответ через самый быстрый доступный endpoint (с hedging и failover)"""
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout
+
+        candidates = self._ranked()
+        if not candidates:
+            self.counters["no_endpoints"] += 1
+            raise LLMError("Все LLM endpoint'ы выведены из ротации")
+
+        pending: Dict[asyncio.Task, EndpointState] = {}
+        next_idx = 0
+        hedged = False
+        last_error: Optional[LLMError] = None
+
+        def launch() -> Optional[EndpointState]:
+            """Отправить запрос на следующий кандидат, который ещё можно занять"""
+            nonlocal next_idx
+            while next_idx < len(candidates):
+                ep = candidates[next_idx]
+                next_idx += 1
+                # пробный запрос half-open endpoint'а мог занять параллельный generate()
+                if not ep.acquire(time.monotonic()):
+                    continue
+                task = asyncio.create_task(
+                    self._call(ep, system_prompt, user_message, deadline - time.monotonic())
+                )
+                pending[task] = ep
+                return ep
+            return None
+
+        first = launch()
+        if first is None:
+            self.counters["no_endpoints"] += 1
+            raise LLMError("Все LLM endpoint'ы выведены из ротации")
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # основной endpoint не ответил за весь бюджет - это ошибка (в отличие от проигранного hedge)
+                    if first in pending.values():
+                        self._record_failure(first)
+                    raise LLMTimeoutError(f"LLM timeout after {timeout:.1f}s")
+
+                wait_time = remaining
+                can_hedge = not hedged and next_idx < len(candidates)
+                if can_hedge:
+                    wait_time = min(remaining, self._hedge_delay(first))
+
+                done, _ = await asyncio.wait(pending, timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if can_hedge and time.monotonic() < deadline:
+                        hedged = True
+                        first.counters["missed_hedge"] += 1
+                        if launch() is not None:
+                            self.counters["hedged"] += 1
+                            logger.info(f"Hedging LLM request: {first.name} slower than {wait_time:.2f}s")
+                    continue
+
+                for task in done:
+                    ep = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except LLMError as e:
+                        last_error = e
+                        continue
+                    ep.counters["win"] += 1
+                    if hedged and ep is not first:
+                        self.counters["hedge_won"] += 1
+                    return result
+
+                # все завершившиеся упали: failover на следующий endpoint
+                if not pending and launch() is not None:
+                    self.counters["failover"] += 1
+
+            raise last_error or LLMError("LLM request failed")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "endpoints": [ep.stats() for ep in self.endpoints],
+        }
@@ -4,32 +4,59 @@ LLM клиент для Perplexity API
 """
 import httpx
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"  # из доков pplx-api
+
+
+class LLMError(Exception):
+    """Ошибка при обращении к LLM"""
+
+
+class LLMTimeoutError(LLMError):
+    """LLM не ответил за отведённое время"""
+
 
 class LLMClient:
     """Клиент для Perplexity pplx-api"""
 
-    def __init__(self, api_key: str, model: str = "mistral-7b-instruct"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "mistral-7b-instruct",
+        timeout: float = 30.0,
+        base_url: str = PERPLEXITY_URL,
+    ):
         self.api_key = api_key
         self.model = model
-        self.base_url = "https://api.perplexity.ai/chat/completions"  # из доков pplx-api
+        self.timeout = timeout
+        # любой OpenAI-совместимый /chat/completions (например, mock_llm_simple.py)
+        self.base_url = base_url
+
+    async def generate(self, system_prompt: str, user_message: str, timeout: Optional[float] = None) -> str:
+        """
+        Генерировать ответ через Perplexity API.
+
+        timeout - сколько секунд можно ждать ответа (по умолчанию self.timeout).
+        При ошибке бросает LLMError, при таймауте - LLMTimeoutError.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2000,
+        }
 
-    async def generate(self, system_prompt: str, user_message: str) -> str:
-        """Генерировать ответ через Perplexity API"""
         try:
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message},
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2000,
-            }
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=timeout) as client:
                 response = await client.post(
                     self.base_url,
                     headers={
@@ -39,26 +66,32 @@ class LLMClient:
                     },
                     json=payload,
                 )
+        except httpx.TimeoutException as e:
+            logger.warning(f"Perplexity API timeout after {timeout:.1f}s: {e}")
+            raise LLMTimeoutError(f"LLM timeout after {timeout:.1f}s") from e
+        except Exception as e:
+            logger.error(f"Error calling Perplexity API: {e}")
+            raise LLMError(f"Ошибка при обращении к LLM: {str(e)}") from e
 
-            if response.status_code != 200:
-                logger.error(f"Perplexity API error: {response.status_code} {response.text}")
-                return f"Ошибка LLM: {response.status_code}"
+        if response.status_code != 200:
+            logger.error(f"Perplexity API error: {response.status_code} {response.text}")
+            raise LLMError(f"Ошибка LLM: {response.status_code}")
 
+        try:
             data = response.json()
             # Схема ответа совместима с OpenAI: choices[0].message.content
             return data["choices"][0]["message"]["content"]
-
         except Exception as e:
-            logger.error(f"Error calling Perplexity API: {e}")
-            return f"Ошибка при обращении к LLM: {str(e)}"
+            logger.error(f"Unexpected Perplexity API response: {e}")
+            raise LLMError(f"Некорректный ответ LLM: {str(e)}") from e
 
 
 _llm_client = None
 
 
-def get_llm_client(api_key: str, model: str = "mistral-7b-instruct"):
+def get_llm_client(api_key: str, model: str = "mistral-7b-instruct", base_url: str = PERPLEXITY_URL):
     """Получить глобальный LLM клиент"""
     global _llm_client
     if _llm_client is None:
-        _llm_client = LLMClient(api_key, model)
+        _llm_client = LLMClient(api_key, model, base_url=base_url)
     return _llm_client
@@ -0,0 +1,221 @@
+"""
+Нагрузочный тест /api/ask
+
+Гоняет запросы с заданной параллельностью и (опционально) частотой,
+в конце печатает пропускную способность, p50/p95/p99 задержки и ошибки.
+
+С --rate задержка считается от запланированного момента отправки, а не от
+момента, когда освободился слот: время в очереди клиента входит в p95/p99
+(иначе перегрузка сервера прячется - coordinated omission). Отдельно
+печатаются запросы, ждавшие слота; отброшенные из-за переполнения очереди
+считаются ошибками ("dropped") и входят в число запросов и error rate.
+
+    # 1. mock LLM вместо Perplexity
+    python mock_llm_simple.py --port 8100 --latency 1.0 --token-rate 50
+    # 2. сервер, направленный на mock
+    LLM_BASE_URL=http://localhost:8100/chat/completions python main_simple.py
+    # 3. нагрузка
+    python loadtest_simple.py --concurrency 32 --rate 20 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "Что такое линейная регрессия?",
+    "Как работает градиентный спуск?",
+    "Что такое переобучение?",
+    "Чем отличается классификация от регрессии?",
+    "Что такое функция потерь?",
+]
+
+
+class Stats:
+    """Результаты прогона"""
+
+    def __init__(self):
+        self.latencies: List[float] = []  # от запланированной отправки до ответа (успешные)
+        self.service: List[float] = []  # от фактической отправки до ответа (успешные)
+        self.first_byte: List[float] = []  # от запланированной отправки до первого байта (успешные)
+        self.queue_waits: List[float] = []  # сколько запрос ждал свободного слота
+        self.queued = 0  # запросов, которым пришлось ждать слота
+        self.schedule_seconds = 0.0  # сколько длилась отправка (без ожидания последних ответов)
+        self.errors: Counter = Counter()  # в т.ч. "dropped" - отброшены из-за переполнения очереди
+        self.sources: Counter = Counter()  # поле source ответа /api/ask
+
+    @property
+    def ok(self) -> int:
+        return len(self.latencies)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+async def one_request(client: httpx.AsyncClient, url: str, question: str, stats: Stats, scheduled: float):
+    """scheduled - запланированный момент отправки (perf_counter), от него считается задержка"""
+    sent = time.perf_counter()
+    try:
+        async with client.stream("POST", url, json={"question": question}) as response:
+            first_byte: Optional[float] = None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - scheduled
+                body += chunk
+        done = time.perf_counter()
+
+        if response.status_code != 200:
+            stats.errors[f"http_{response.status_code}"] += 1
+            return
+
+        stats.latencies.append(done - scheduled)
+        stats.service.append(done - sent)
+        stats.first_byte.append(first_byte if first_byte is not None else done - scheduled)
+        if response.headers.get("content-type", "").startswith("application/json"):
+            try:
+                stats.sources[json.loads(body).get("source", "?")] += 1
+            except Exception:
+                stats.errors["bad_json"] += 1
+    except httpx.TimeoutException:
+        stats.errors["timeout"] += 1
+    except Exception as e:
+        stats.errors[type(e).__name__] += 1
+
+
+async def run(args) -> Stats:
+    url = args.url.rstrip("/") + args.endpoint
+    questions = DEFAULT_QUESTIONS
+    if args.questions_file:
+        with open(args.questions_file, encoding="utf-8") as f:
+            questions = [ln.strip() for ln in f if ln.strip()]
+
+    stats = Stats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        waiting = 0  # запросов в очереди клиента (ждут слота)
+
+        async def worker(question: str, scheduled: float):
+            nonlocal waiting
+            if semaphore.locked():
+                if waiting >= args.max_queue:
+                    stats.errors["dropped"] += 1
+                    return
+                stats.queued += 1
+            waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                waiting -= 1
+            stats.queue_waits.append(time.perf_counter() - scheduled)
+            try:
+                await one_request(client, url, question, stats, scheduled)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        sent = 0
+        started = next_at = time.perf_counter()
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if deadline is None and sent >= args.requests:
+                break
+
+            if args.rate > 0:
+                # открытая модель нагрузки: запросы с заданной частотой (пуассоновский поток),
+                # планировщик не ждёт свободного слота - ждёт сам запрос, и это время входит в задержку
+                next_at += random.expovariate(args.rate)
+                await asyncio.sleep(max(next_at - time.perf_counter(), 0.0))
+                scheduled = next_at
+            else:
+                # закрытая модель: следующий запрос - как только освободился слот
+                await semaphore.acquire()
+                semaphore.release()
+                scheduled = time.perf_counter()
+
+            tasks.append(asyncio.create_task(worker(random.choice(questions), scheduled)))
+            sent += 1
+            # дать задаче занять слот до следующей итерации (важно для закрытой модели)
+            await asyncio.sleep(0)
+
+        stats.schedule_seconds = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+    return stats
+
+
+def report(stats: Stats, wall: float):
+    # все запланированные запросы (offered load), включая отброшенные клиентом
+    total = stats.ok + sum(stats.errors.values())
+    print(f"Requests: {total}, ok: {stats.ok}, errors: {sum(stats.errors.values())}, wall: {wall:.1f}s")
+    offered_rate = total / stats.schedule_seconds if stats.schedule_seconds else 0.0
+    print(f"Throughput: {stats.ok / wall:.2f} ok req/s, offered: {offered_rate:.2f} req/s")
+    print(f"Queued (waited for a slot): {stats.queued}, dropped (queue full): {stats.errors['dropped']}")
+    if stats.queue_waits:
+        print(
+            "Queue wait: "
+            f"p50={percentile(stats.queue_waits, 50):.3f}s "
+            f"p95={percentile(stats.queue_waits, 95):.3f}s "
+            f"p99={percentile(stats.queue_waits, 99):.3f}s"
+        )
+    if stats.latencies:
+        print(
+            "Latency:    "
+            f"p50={percentile(stats.latencies, 50):.3f}s "
+            f"p95={percentile(stats.latencies, 95):.3f}s "
+            f"p99={percentile(stats.latencies, 99):.3f}s "
+            f"max={max(stats.latencies):.3f}s"
+        )
+        print(
+            "Service:    "
+            f"p50={percentile(stats.service, 50):.3f}s "
+            f"p95={percentile(stats.service, 95):.3f}s "
+            f"p99={percentile(stats.service, 99):.3f}s"
+        )
+        print(
+            "First byte: "
+            f"p50={percentile(stats.first_byte, 50):.3f}s "
+            f"p95={percentile(stats.first_byte, 95):.3f}s "
+            f"p99={percentile(stats.first_byte, 99):.3f}s"
+        )
+    if total:
+        print(f"Error rate: {sum(stats.errors.values()) / total:.2%}")
+    for name, count in stats.errors.most_common():
+        print(f"  {name}: {count}")
+    if stats.sources:
+        print("Sources: " + ", ".join(f"{k}={v}" for k, v in stats.sources.most_common()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест /api/ask")
+    parser.add_argument("--url", type=str, default="http://localhost:8000", help="Адрес сервера")
+    parser.add_argument("--endpoint", type=str, default="/api/ask", help="Путь endpoint'а")
+    parser.add_argument("--concurrency", type=int, default=8, help="Максимум одновременных запросов")
+    parser.add_argument("--rate", type=float, default=0.0, help="Запросов в секунду (0 - без ограничения)")
+    parser.add_argument("--requests", type=int, default=100, help="Сколько запросов отправить")
+    parser.add_argument("--duration", type=float, default=0.0, help="Длительность в секундах (вместо --requests)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Таймаут одного запроса")
+    parser.add_argument("--max-queue", type=int, default=1000, help="Максимум запросов, ждущих слота (остальные отбрасываются)")
+    parser.add_argument("--questions-file", type=str, default=None, help="Файл с вопросами (по одному на строку)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = asyncio.run(run(args))
+    report(stats, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 """
 FastAPI сервер (основной)
 """
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
@@ -12,8 +13,11 @@ import threading
 
 from config_simple import get_settings
 from chroma_db_simple import ChromaDB
-from llm_simple import get_llm_client
+from llm_simple import get_llm_client, LLMError, LLMTimeoutError
+from llm_router_simple import LLMRouter
 from embeddings_simple import get_embedding_model
+from deadline_simple import Deadline, DeadlineExceeded, record_degradation, get_degradation_stats
+from profiling_simple import profile_block, should_profile
 
 # Логирование
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +25,24 @@ logger = logging.getLogger(__name__)
 
 # Инициализировать сервисы
 settings = get_settings()
-db = ChromaDB(settings.CHROMA_DB_PATH, settings.COLLECTION_NAME)
-llm_client = get_llm_client(settings.LLM_API_KEY, settings.LLM_MODEL)
+db = ChromaDB(
+    settings.CHROMA_DB_PATH,
+    settings.COLLECTION_NAME,
+    compression=settings.EMBEDDING_COMPRESSION,
+    compressed_dim=settings.EMBEDDING_COMPRESSED_DIM,
+    rescore_candidates=settings.RESCORE_CANDIDATES,
+)
+if settings.LLM_ENDPOINTS:
+    llm_client = LLMRouter.from_config(
+        settings.LLM_ENDPOINTS,
+        settings.LLM_API_KEY,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+        failure_threshold=settings.LLM_BREAKER_FAILURES,
+        cooldown=settings.LLM_BREAKER_COOLDOWN,
+    )
+else:
+    llm_client = get_llm_client(settings.LLM_API_KEY, settings.LLM_MODEL, settings.LLM_BASE_URL)
 embedding_model = get_embedding_model()
 
 # FastAPI приложение
@@ -58,10 +78,49 @@ class AskResponse(BaseModel):
     citations: List[Citation] = []
 
 
+def _degraded_response(search_results: List[dict], reason: str) -> AskResponse:
+    """
+    Ответ без LLM: ранжированные цитаты и фрагменты конспектов.
+    source="citations_only", чтобы клиент мог отличить его от обычного ответа.
+    """
+    record_degradation(reason)
+    logger.warning(f"Degraded response: {reason}")
+
+    snippets = []
+    citations = []
+    for i, result in enumerate(search_results, start=1):
+        snippet = " ".join(result['text'][:300].split())
+        snippets.append(f"{i}. **{result['file']}**, стр. {result['page']}:\n\n> {snippet}...")
+        citations.append(Citation(
+            file=result['file'],
+            page=result['page'],
+            text=result['text'][:80] + "..."
+        ))
+
+    answer = (
+        "Не удалось получить ответ LLM. "
+        "Ниже - наиболее релевантные фрагменты конспектов:\n\n" + "\n\n".join(snippets)
+    )
+    return AskResponse(answer=answer, source="citations_only", citations=citations)
+
+
 
 @app.post("/api/ask", response_model=AskResponse)
-async def ask_question(request: AskRequest) -> AskResponse:
+async def ask_question(request: AskRequest, http_request: Request) -> AskResponse:
     """Задать вопрос"""
+    # Профилирование по заголовку (X-Profile: <PROFILE_SECRET>) или по доле PROFILE_SAMPLE_RATE
+    profile = should_profile(
+        http_request.headers.get(settings.PROFILE_HEADER),
+        settings.PROFILE_SAMPLE_RATE,
+        secret=settings.PROFILE_SECRET,
+        min_interval=settings.PROFILE_MIN_INTERVAL_SECONDS,
+    )
+    with profile_block("ask", settings.PROFILE_DIR, enabled=profile, max_files=settings.PROFILE_MAX_FILES):
+        return await _answer_question(request)
+
+
+async def _answer_question(request: AskRequest) -> AskResponse:
+    deadline = Deadline(settings.ASK_DEADLINE_SECONDS)
     try:
         question = request.question.strip()
         print(question)
@@ -71,7 +130,24 @@ async def ask_question(request: AskRequest) -> AskResponse:
         
         #релевантные чанки
         logger.info(f"Question: {question}")
-        search_results = db.search(question, top_k=settings.RETRIEVAL_TOP_K)
+        try:
+            deadline.check("embed")
+            # эмбеддинг и поиск синхронные: в отдельном потоке, чтобы не блокировать event loop
+            # (и бюджеты других запросов) и чтобы медленный поиск можно было не дожидаться
+            search_results = await asyncio.wait_for(
+                asyncio.to_thread(db.search, question, settings.RETRIEVAL_TOP_K, deadline),
+                timeout=deadline.remaining(),
+            )
+        except (DeadlineExceeded, asyncio.TimeoutError) as e:
+            # Цитат нет - деградировать не к чему
+            reason = f"deadline_before_{e.stage}" if isinstance(e, DeadlineExceeded) else "search_timeout"
+            record_degradation(reason)
+            logger.warning(f"Search did not fit the deadline: {reason}")
+            return AskResponse(
+                answer="Сервер перегружен, не успел найти ответ. Попробуйте ещё раз.",
+                source="error",
+                citations=[]
+            )
         
         if not search_results:
             logger.info("No results found")
@@ -127,8 +203,24 @@ async def ask_question(request: AskRequest) -> AskResponse:
 
 Ответь на вопрос на основе контекста выше."""
 
-        logger.info("Generating answer...")
-        answer = await llm_client.generate(system_prompt, user_message)
+        # На LLM должно остаться достаточно времени, иначе сразу отдаём цитаты
+        llm_budget = deadline.remaining()
+        if llm_budget < settings.LLM_MIN_BUDGET_SECONDS:
+            return _degraded_response(search_results[:3], "deadline_before_llm")
+
+        logger.info(f"Generating answer (budget {llm_budget:.1f}s)...")
+        try:
+            # wait_for ограничивает общее время, таймаут httpx - только отдельные операции
+            answer = await asyncio.wait_for(
+                llm_client.generate(system_prompt, user_message, timeout=llm_budget),
+                timeout=llm_budget,
+            )
+        except asyncio.TimeoutError:
+            return _degraded_response(search_results[:3], "llm_timeout")
+        except LLMTimeoutError:
+            return _degraded_response(search_results[:3], "llm_timeout")
+        except LLMError:
+            return _degraded_response(search_results[:3], "llm_error")
         
         return AskResponse(
             answer=answer,
@@ -147,7 +239,10 @@ async def get_stats():
     return {
         "total_chunks": db.get_count(),
         "chunk_size": settings.CHUNK_SIZE,
-        "retrieval_top_k": settings.RETRIEVAL_TOP_K
+        "retrieval_top_k": settings.RETRIEVAL_TOP_K,
+        "degradations": get_degradation_stats(),
+        "embedding_compression": db.compression_stats(),
+        "llm_router": llm_client.stats() if isinstance(llm_client, LLMRouter) else None
     }
 
 
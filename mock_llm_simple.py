@@ -0,0 +1,126 @@
+"""
+Локальный mock OpenAI-совместимого LLM для нагрузочных тестов
+
+Отвечает на POST /chat/completions (и /v1/chat/completions) с настраиваемой
+задержкой до первого токена, скоростью генерации и долей ошибок.
+Поддерживает "stream": true (SSE в формате OpenAI).
+
+    python mock_llm_simple.py --port 8100 --latency 0.5 --token-rate 50
+    LLM_BASE_URL=http://localhost:8100/chat/completions python main_simple.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class MockConfig:
+    """Параметры поведения mock-сервера (задаются из командной строки)"""
+
+    latency: float = 0.5  # секунды до первого токена
+    jitter: float = 0.1  # +- случайная добавка к latency
+    tokens: int = 200  # токенов в ответе
+    token_rate: float = 100.0  # токенов в секунду (0 - мгновенно)
+    error_rate: float = 0.0  # доля ответов 500
+    spike_rate: float = 0.0  # доля запросов с всплеском задержки
+    spike_latency: float = 5.0  # задержка при всплеске, секунды
+
+
+config = MockConfig()
+
+app = FastAPI(title="Mock LLM", description="OpenAI-совместимый mock для нагрузочных тестов")
+
+_WORDS = ["линейная", "регрессия", "градиент", "функция", "потерь", "модель", "данные", "признак"]
+
+
+def _first_token_delay() -> float:
+    if random.random() < config.spike_rate:
+        return config.spike_latency
+    return max(config.latency + random.uniform(-config.jitter, config.jitter), 0.0)
+
+
+def _token_delay() -> float:
+    return 1.0 / config.token_rate if config.token_rate > 0 else 0.0
+
+
+def _completion_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+
+async def _stream(model: str):
+    completion_id = _completion_id()
+    await asyncio.sleep(_first_token_delay())
+    for i in range(config.tokens):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": random.choice(_WORDS) + " "}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        await asyncio.sleep(_token_delay())
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    model = payload.get("model", "mock")
+
+    if random.random() < config.error_rate:
+        await asyncio.sleep(_first_token_delay())
+        return JSONResponse(status_code=500, content={"error": {"message": "mock error"}})
+
+    if payload.get("stream"):
+        return StreamingResponse(_stream(model), media_type="text/event-stream")
+
+    # без стриминга клиент ждёт всю генерацию целиком
+    await asyncio.sleep(_first_token_delay() + config.tokens * _token_delay())
+    content = " ".join(random.choice(_WORDS) for _ in range(config.tokens))
+    return {
+        "id": _completion_id(),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": config.tokens, "total_tokens": config.tokens},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-совместимого LLM")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=MockConfig.latency, help="Секунды до первого токена")
+    parser.add_argument("--jitter", type=float, default=MockConfig.jitter, help="Разброс задержки, секунды")
+    parser.add_argument("--tokens", type=int, default=MockConfig.tokens, help="Токенов в ответе")
+    parser.add_argument("--token-rate", type=float, default=MockConfig.token_rate, help="Токенов в секунду")
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate, help="Доля ответов 500")
+    parser.add_argument("--spike-rate", type=float, default=MockConfig.spike_rate, help="Доля запросов со всплеском задержки")
+    parser.add_argument("--spike-latency", type=float, default=MockConfig.spike_latency, help="Задержка при всплеске, секунды")
+    args = parser.parse_args()
+
+    config.latency = args.latency
+    config.jitter = args.jitter
+    config.tokens = args.tokens
+    config.token_rate = args.token_rate
+    config.error_rate = args.error_rate
+    config.spike_rate = args.spike_rate
+    config.spike_latency = args.spike_latency
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# page_cache_simple.py
+"""
+Дисковый кэш извлечённого текста страниц PDF
+
+Ключ: sha256 содержимого файла + версия экстрактора; внутри - страницы по индексу.
+Позволяет перечанковать корпус (другие CHUNK_SIZE/CHUNK_OVERLAP) без pdfplumber.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(path: str) -> str:
+    """sha256 содержимого файла"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PageCache:
+    """
+    Кэш страниц: data/page_cache/<sha256>_v<extractor_version>.json
+
+    Каждая страница: {"page_index", "text", "logical_page", "page_number_version"}.
+    """
+
+    def __init__(self, cache_dir: str = "data/page_cache"):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, file_hash: str, extractor_version: int) -> Path:
+        return self.cache_dir / f"{file_hash}_v{extractor_version}.json"
+
+    def load(self, file_hash: str, extractor_version: int) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(file_hash, extractor_version)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except Exception as e:
+            logger.warning(f"Broken page cache entry {path}: {e}")
+            return None
+
+    def save(self, file_hash: str, extractor_version: int, pages: List[Dict[str, Any]]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(file_hash, extractor_version)
+        # пишем во временный файл и переименовываем, чтобы не оставить обрезанный JSON
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages}, f, ensure_ascii=False)
+        tmp.replace(path)
@@ -9,9 +9,18 @@ from typing import List, Dict, Any, Optional
 import pdfplumber
 
 from embeddings_simple import get_embedding_model
+from page_cache_simple import PageCache, file_content_hash
+from chunk_batch_simple import ChunkBatch, ChunkBatchBuilder
 
 logger = logging.getLogger(__name__)
 
+# Версии для ключей кэша страниц (page_cache_simple):
+# EXTRACTOR_VERSION - поменяли параметры извлечения текста pdfplumber (кэш заново);
+# PAGE_NUMBER_VERSION - поменяли _detect_printed_page_number_from_lines
+# (номера пересчитываются по закэшированному тексту, PDF не открывается).
+EXTRACTOR_VERSION = 1
+PAGE_NUMBER_VERSION = 1
+
 
 def split_text_into_chunks(text: str, chunk_size: int = 512, overlap: int = 100) -> List[str]:
     """Разбить текст на куски с перекрытием"""
@@ -53,73 +62,127 @@ def _detect_printed_page_number_from_lines(lines: List[str]) -> Optional[int]:
     return None
 
 
-def parse_pdf(pdf_path: str, chunk_size: int = 512, chunk_overlap: int = 100) -> List[Dict[str, Any]]:
+def _extract_pages_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
+    """Прогнать pdfplumber по всем страницам (самый дорогой этап индексирования)"""
+    pages: List[Dict[str, Any]] = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_index, page in enumerate(pdf.pages, start=1):
+            text_layout = page.extract_text(layout=True) or ""
+            pages.append(
+                {
+                    "page_index": page_index,
+                    "text": text_layout,
+                    "logical_page": _detect_printed_page_number_from_lines(text_layout.split("\n")),
+                    "page_number_version": PAGE_NUMBER_VERSION,
+                }
+            )
+    return pages
+
+
+def extract_pages(pdf_path: str, cache: Optional[PageCache] = None) -> List[Dict[str, Any]]:
     """
-    читает PDF и создает чанки.
+    Текст страниц PDF (layout=True) и найденный на них номер страницы.
 
-    Возвращает список словарей вида:
-    {
-        "id": "file_pageIndex_chunkIndex",
-        "text": "содержание",
-        "file": "name.pdf",
-        "page": logical_page_number, 
-        "pdf_page_index": 
-    }
+    С cache повторный запуск по тому же файлу не открывает PDF; если поменялась
+    только эвристика номера страницы (PAGE_NUMBER_VERSION), номер
+    пересчитывается по закэшированному тексту.
     """
-    chunks_list: List[Dict[str, Any]] = []
+    if cache is None:
+        return _extract_pages_from_pdf(pdf_path)
+
+    file_hash = file_content_hash(pdf_path)
+    pages = cache.load(file_hash, EXTRACTOR_VERSION)
+    if pages is None:
+        pages = _extract_pages_from_pdf(pdf_path)
+        cache.save(file_hash, EXTRACTOR_VERSION, pages)
+        return pages
+
+    logger.info(f"Page cache hit: {pdf_path}")
+    stale = [p for p in pages if p.get("page_number_version") != PAGE_NUMBER_VERSION]
+    for page in stale:
+        page["logical_page"] = _detect_printed_page_number_from_lines(page["text"].split("\n"))
+        page["page_number_version"] = PAGE_NUMBER_VERSION
+    if stale:
+        cache.save(file_hash, EXTRACTOR_VERSION, pages)
+    return pages
+
+
+def chunk_pages(
+    pages: List[Dict[str, Any]],
+    file_name: str,
+    chunk_size: int = 512,
+    chunk_overlap: int = 100,
+) -> ChunkBatch:
+    """Разбить страницы (результат extract_pages) на чанки"""
+    builder = ChunkBatchBuilder(file_name)
+
+    for page in pages:
+        page_index = page["page_index"]
+        text_layout = page["text"]
+        if not text_layout.strip():
+            continue
+
+        lines = text_layout.split("\n")
+
+        logical_page = page["logical_page"]
+        if logical_page is None:
+            logical_page = page_index  # fallback: физический индекс страницы
+
+        # Убираем последнюю строку
+        if lines and lines[-1].strip().isdigit():
+            lines = lines[:-1]
+
+        cleaned_text = "\n".join(lines)
+        if not cleaned_text.strip():
+            continue
+
+        # Разбиваем текст страницы на чанки
+        page_chunks = split_text_into_chunks(cleaned_text, chunk_size, chunk_overlap)
+
+        for chunk_idx, chunk_text in enumerate(page_chunks):
+            # page - логический номер страницы для цитат, pdf_page_index - физический (debug)
+            builder.add(chunk_text, logical_page, page_index, chunk_idx)
+
+    return builder.build()
+
+
+def parse_pdf(
+    pdf_path: str,
+    chunk_size: int = 512,
+    chunk_overlap: int = 100,
+    cache: Optional[PageCache] = None,
+) -> ChunkBatch:
+    """
+    читает PDF и создает чанки.
 
+    Возвращает ChunkBatch (колонки text / file / page / pdf_page_index / chunk_idx),
+    id чанков - "file_pageIndex_chunkIndex" (см. ChunkBatch.ids).
+    Старый формат - список словарей - можно получить через batch.to_dicts().
+    """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            file_name = Path(pdf_path).name
-
-            for page_index, page in enumerate(pdf.pages, start=1):
-                text_layout = page.extract_text(layout=True) or ""
-                if not text_layout.strip():
-                    continue
-
-                lines = text_layout.split("\n")
-
-                logical_page = _detect_printed_page_number_from_lines(lines)
-                if logical_page is None:
-                    logical_page = page_index  # fallback: физический индекс страницы
-
-                # Убираем последнюю строку
-                if lines and lines[-1].strip().isdigit():
-                    lines = lines[:-1]
-
-                cleaned_text = "\n".join(lines)
-                if not cleaned_text.strip():
-                    continue
-
-                # Разбиваем текст страницы на чанки
-                page_chunks = split_text_into_chunks(cleaned_text, chunk_size, chunk_overlap)
-
-                for chunk_idx, chunk_text in enumerate(page_chunks):
-                    chunks_list.append(
-                        {
-                            "id": f"{file_name}_page{page_index}_chunk{chunk_idx}",
-                            "text": chunk_text,
-                            "file": file_name,
-                            # логический номер страницы для отображения в цитатах
-                            "page": logical_page,
-                            # физический индекс страницы в PDF  --- debug
-                            "pdf_page_index": page_index,
-                        }
-                    )
-
-        logger.info(f"Parsed {pdf_path}: {len(chunks_list)} chunks from {len(pdf.pages)} pages")
-        return chunks_list
+        pages = extract_pages(pdf_path, cache)
+        batch = chunk_pages(pages, Path(pdf_path).name, chunk_size, chunk_overlap)
+
+        logger.info(f"Parsed {pdf_path}: {len(batch)} chunks from {len(pages)} pages")
+        return batch
 
     except Exception as e:
         logger.error(f"Error parsing {pdf_path}: {e}")
-        return []
+        return ChunkBatch.empty()
 
 
-def index_pdf_files(pdf_dir: str, db, chunk_size: int = 512, chunk_overlap: int = 100):
+def index_pdf_files(
+    pdf_dir: str,
+    db,
+    chunk_size: int = 512,
+    chunk_overlap: int = 100,
+    page_cache: Optional[PageCache] = None,
+):
     """
     Индексировать все PDF в папке.
 
-    db - экземпляр ChromaDB (ожидает, что в чанках есть поле 'embedding').
+    db - экземпляр ChromaDB (чанки передаются через add_batch вместе с эмбеддингами).
+    page_cache - кэш извлечённых страниц (None - всегда парсить PDF заново).
     """
     pdf_dir_path = Path(pdf_dir)
 
@@ -134,29 +197,23 @@ def index_pdf_files(pdf_dir: str, db, chunk_size: int = 512, chunk_overlap: int
 
     logger.info(f"Found {len(pdf_files)} PDF files")
 
-    all_chunks: List[Dict[str, Any]] = []
-    for pdf_file in pdf_files:
-        chunks = parse_pdf(str(pdf_file), chunk_size, chunk_overlap)
-        all_chunks.extend(chunks)
+    batch = ChunkBatch.concat(
+        [parse_pdf(str(pdf_file), chunk_size, chunk_overlap, cache=page_cache) for pdf_file in pdf_files]
+    )
 
-    if not all_chunks:
+    if not len(batch):
         logger.warning("No chunks created")
         return 0
 
-    logger.info(f"Total chunks: {len(all_chunks)}")
+    logger.info(f"Total chunks: {len(batch)}")
 
-    #эмбеддинги
+    #эмбеддинги: float32 матрица [N, D], без list[list[float]]
     logger.info("Computing embeddings...")
     embedding_model = get_embedding_model()
-    texts = [chunk["text"] for chunk in all_chunks]
-    embeddings = embedding_model.embed(texts)
-
-    # Добавить эмбеддинги к чанкам
-    for chunk, embedding in zip(all_chunks, embeddings):
-        chunk["embedding"] = embedding
+    batch.embeddings = embedding_model.embed_array(batch.texts)
 
     logger.info("Adding chunks to database...")
-    db.add_chunks(all_chunks)
+    db.add_batch(batch)
 
-    logger.info(f"Indexed {len(all_chunks)} chunks successfully!")
-    return len(all_chunks)
+    logger.info(f"Indexed {len(batch)} chunks successfully!")
+    return len(batch)
@@ -0,0 +1,129 @@
+# profiling_simple.py
+"""
+Профилирование отдельных запросов по требованию
+
+Профайлер - pyinstrument (сэмплирующий, HTML с деревом вызовов; есть в
+requirements-simple.txt). Если его нет, используется cProfile - это НЕ
+сэмплирующий, а детерминированный профайлер с заметными накладными расходами;
+результат в .pstats (`python -m pstats` или snakeviz), и для async-запросов
+он видит и другие корутины, выполнявшиеся в это время в event loop.
+Когда профилирование выключено, накладные расходы - одна проверка флага.
+
+Защита от заполнения диска: заголовок принимается только с секретом,
+профили не чаще min_interval секунд, в каталоге хранится не больше max_files файлов.
+"""
+import cProfile
+import hmac
+import logging
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument - необязательная зависимость
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_SUFFIXES = (".html", ".pstats")
+
+# cProfile не умеет профилировать два запроса одновременно - второй пропускаем
+_active = False
+# время (monotonic) последнего разрешённого профиля запроса
+_last_profile_at: Optional[float] = None
+
+
+def should_profile(
+    header_value: Optional[str],
+    sample_rate: float,
+    secret: Optional[str] = None,
+    min_interval: float = 0.0,
+) -> bool:
+    """
+    Профилировать ли запрос: заголовок со значением secret или случайная выборка
+    с долей sample_rate. Без secret заголовок игнорируется. Не чаще одного
+    профиля в min_interval секунд.
+    """
+    global _last_profile_at
+    by_header = bool(
+        secret and header_value and hmac.compare_digest(header_value.strip().encode(), secret.encode())
+    )
+    if not by_header and not (sample_rate > 0 and random.random() < sample_rate):
+        return False
+
+    now = time.monotonic()
+    if _last_profile_at is not None and now - _last_profile_at < min_interval:
+        return False
+    _last_profile_at = now
+    return True
+
+
+def _prune(output_dir: Path, max_files: int):
+    """Оставить в каталоге только max_files самых свежих профилей"""
+    files = sorted(
+        (p for p in output_dir.iterdir() if p.suffix in _PROFILE_SUFFIXES),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for old in files[: max(len(files) - max_files, 0)]:
+        old.unlink(missing_ok=True)
+
+
+def _output_path(output_dir: str, name: str, suffix: str) -> Path:
+    path = Path(output_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return path / f"{name}_{stamp}_{uuid.uuid4().hex[:8]}{suffix}"
+
+
+@contextmanager
+def profile_block(
+    name: str,
+    output_dir: str = "data/profiles",
+    enabled: bool = True,
+    max_files: Optional[int] = None,
+):
+    """
+    Профилировать блок кода и сохранить результат в output_dir
+    (если задан max_files - старые профили сверх лимита удаляются).
+
+    with profile_block("ask", settings.PROFILE_DIR, enabled=flag):
+        ...
+    """
+    global _active
+    if not enabled or _active:
+        yield
+        return
+
+    _active = True
+    try:
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                out = _output_path(output_dir, name, ".html")
+                out.write_text(profiler.output_html(), encoding="utf-8")
+                logger.info(f"Profile saved: {out}")
+                if max_files:
+                    _prune(out.parent, max_files)
+        else:
+            logger.warning("pyinstrument is not installed, using deterministic cProfile (not sampling)")
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                out = _output_path(output_dir, name, ".pstats")
+                profiler.dump_stats(str(out))
+                logger.info(f"Profile saved: {out}")
+                if max_files:
+                    _prune(out.parent, max_files)
+    finally:
+        _active = False
@@ -0,0 +1,293 @@
+# quantization_simple.py
+"""
+Сжатое представление эмбеддингов для первого прохода поиска
+
+Режимы:
+- "float16"  - половинная точность (x2 меньше памяти);
+- "int8"     - скалярная квантизация с масштабом на каждый вектор (x4);
+- "truncate" - первые `dim` координат, заново нормированные;
+- "pca"      - проекция на `dim` главных компонент (пока векторов меньше `dim` -
+               как truncate; базис пересчитывается по мере роста индекса).
+
+В памяти - только сжатые коды. Точные float32 для пересчёта кандидатов лежат
+рядом на диске (np.memmap, файл .f32) и читаются только для кандидатов.
+"""
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MODES = ("none", "float16", "int8", "truncate", "pca")
+
+# Сколько строк за раз переводить в float32 при скоринге (чтобы не раздувать память)
+_SCORE_BLOCK = 65536
+# pca: на скольких векторах (максимум) считать базис
+_PCA_FIT_ROWS = 20000
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class CompressedIndex:
+    """Сжатые эмбеддинги в памяти + brute-force поиск кандидатов + точные float32 на диске"""
+
+    def __init__(self, mode: str, dim: int = 256, path: Optional[str] = None):
+        if mode not in COMPRESSION_MODES or mode == "none":
+            raise ValueError(f"Unknown compression mode: {mode}")
+        self.mode = mode
+        self.dim = dim
+        self.path = Path(path) if path else None
+        # точные векторы (строки как в codes): np.memmap по exact_path, без path - массив в памяти
+        self.exact_path = self.path.with_suffix(".f32") if self.path else None
+        self.exact: Optional[np.ndarray] = None
+        self.pca_fit_rows = 0  # pca: на скольких векторах посчитан базис (0 - ещё как truncate)
+
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}  # id -> строка в codes
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None  # int8: масштаб на вектор
+        self.mean: Optional[np.ndarray] = None  # pca: среднее
+        self.components: Optional[np.ndarray] = None  # pca: [D, dim]
+        self.full_dim = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- кодирование ---
+
+    def _project(self, x: np.ndarray) -> np.ndarray:
+        # pca без базиса (векторов пока меньше dim) кодируется как truncate
+        if self.components is None:
+            return x[:, : self.dim]
+        return (x - self.mean) @ self.components
+
+    def _encode(self, emb: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.mode == "float16":
+            return emb.astype(np.float16), None
+        if self.mode == "int8":
+            scales = np.abs(emb).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(emb / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        # truncate, pca
+        return _normalize(self._project(emb)).astype(np.float32), None
+
+    def _encode_query(self, query: np.ndarray) -> np.ndarray:
+        if self.mode in ("truncate", "pca"):
+            return _normalize(self._project(query[None, :]))[0]
+        return query
+
+    def _maybe_refit_pca(self):
+        """
+        Базис PCA по первой пачке может быть посчитан на слишком малом числе векторов.
+        Пока векторов меньше dim, коды - как у truncate; дальше базис пересчитывается
+        при каждом удвоении индекса (пока не наберётся _PCA_FIT_ROWS векторов),
+        и все коды заново строятся по точным векторам.
+        """
+        n = len(self.ids)
+        if self.mode != "pca" or n < self.dim:
+            return
+        if self.pca_fit_rows and (self.pca_fit_rows >= _PCA_FIT_ROWS or n < 2 * self.pca_fit_rows):
+            return
+
+        rows = np.arange(n)
+        if n > _PCA_FIT_ROWS:
+            rows = np.sort(np.random.default_rng(0).choice(n, _PCA_FIT_ROWS, replace=False))
+        sample = np.asarray(self.exact[rows], dtype=np.float32)
+        self.mean = sample.mean(axis=0)
+        # главные компоненты через SVD центрированной матрицы
+        _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+        self.components = vt[: self.dim].T.astype(np.float32)
+        self.pca_fit_rows = len(rows)
+        logger.info(f"Fitted PCA basis on {len(rows)} vectors")
+
+        codes = np.empty((n, self.dim), dtype=np.float32)
+        for start in range(0, n, _SCORE_BLOCK):
+            block = np.asarray(self.exact[start : start + _SCORE_BLOCK], dtype=np.float32)
+            codes[start : start + len(block)] = self._encode(block)[0]
+        self.codes = codes
+
+    # --- точные векторы ---
+
+    def _open_exact(self):
+        rows = self.exact_path.stat().st_size // (4 * self.full_dim)
+        self.exact = np.memmap(self.exact_path, dtype=np.float32, mode="r+", shape=(rows, self.full_dim))
+
+    def _append_exact(self, emb: np.ndarray):
+        if self.exact_path is None:
+            self.exact = emb.copy() if self.exact is None else np.concatenate([self.exact, emb])
+            return
+        self.exact_path.parent.mkdir(parents=True, exist_ok=True)
+        self.exact = None
+        with open(self.exact_path, "ab") as f:
+            f.write(np.ascontiguousarray(emb, dtype=np.float32).tobytes())
+        self._open_exact()
+
+    def add(self, ids: List[str], embeddings) -> None:
+        """
+        Добавить векторы (нормированные float32) в индекс.
+
+        Индекс ключуется по id: уже существующие id перезаписываются на месте
+        (повторное индексирование без --clear не создаёт дубликатов).
+        """
+        emb = np.asarray(embeddings, dtype=np.float32)
+        if emb.size == 0:
+            return
+        if self.codes is None:
+            self.full_dim = emb.shape[1]
+            # файл точных векторов от прежнего индекса (без load/reset) - не дописывать к нему
+            if self.exact_path is not None and self.exact_path.exists():
+                self.exact_path.unlink()
+
+        # повторы внутри одного вызова: побеждает последний
+        last: Dict[str, int] = {}
+        for i, id_val in enumerate(ids):
+            last[id_val] = i
+        if len(last) != len(ids):
+            keep = np.fromiter(last.values(), dtype=np.int64)
+            ids = list(last.keys())
+            emb = emb[keep]
+
+        codes, scales = self._encode(emb)
+
+        existing = [(i, self._rows[id_val]) for i, id_val in enumerate(ids) if id_val in self._rows]
+        if existing:
+            src, dst = (np.array(x, dtype=np.int64) for x in zip(*existing))
+            self.codes[dst] = codes[src]
+            if scales is not None:
+                self.scales[dst] = scales[src]
+            self.exact[dst] = emb[src]
+
+        new = np.array([i for i, id_val in enumerate(ids) if id_val not in self._rows], dtype=np.int64)
+        if len(new) == 0:
+            self._maybe_refit_pca()
+            return
+        self._append_exact(emb[new])
+        if self.codes is None:
+            self.codes = codes[new]
+            self.scales = scales[new] if scales is not None else None
+        else:
+            self.codes = np.concatenate([self.codes, codes[new]])
+            if scales is not None:
+                self.scales = np.concatenate([self.scales, scales[new]])
+        for i in new.tolist():
+            self._rows[ids[i]] = len(self.ids)
+            self.ids.append(ids[i])
+        self._maybe_refit_pca()
+
+    # --- поиск ---
+
+    def search(self, query_emb, k: int) -> Tuple[List[str], np.ndarray]:
+        """Вернуть k кандидатов (ids, приближённые cosine similarity) по убыванию"""
+        if self.codes is None or not self.ids:
+            return [], np.empty(0, dtype=np.float32)
+
+        q = self._encode_query(np.asarray(query_emb, dtype=np.float32))
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _SCORE_BLOCK):
+            block = self.codes[start : start + _SCORE_BLOCK].astype(np.float32)
+            scores[start : start + len(block)] = block @ q
+        if self.scales is not None:
+            scores *= self.scales
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.ids[i] for i in top], scores[top]
+
+    def rescore(self, ids: List[str], query_emb) -> np.ndarray:
+        """Точные cosine similarity кандидатов (с диска читаются только их строки)"""
+        rows = np.fromiter((self._rows[id_val] for id_val in ids), dtype=np.int64, count=len(ids))
+        return np.asarray(self.exact[rows], dtype=np.float32) @ np.asarray(query_emb, dtype=np.float32)
+
+    # --- память и хранение ---
+
+    def nbytes(self) -> int:
+        """Сколько байт памяти занимает сжатое представление (без строк ids и точных векторов)"""
+        total = 0
+        for arr in (self.codes, self.scales, self.mean, self.components):
+            if arr is not None:
+                total += arr.nbytes
+        return total
+
+    def float32_nbytes(self) -> int:
+        """Сколько занимали бы те же векторы в float32 полной размерности"""
+        return len(self.ids) * self.full_dim * 4
+
+    def disk_nbytes(self) -> int:
+        """Файлы индекса на диске: сжатые коды (.npz) + точные float32 (.f32)"""
+        return sum(p.stat().st_size for p in (self.path, self.exact_path) if p is not None and p.exists())
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "vectors": len(self.ids),
+            "bytes": self.nbytes(),
+            "float32_bytes": self.float32_nbytes(),
+            "disk_bytes": self.disk_nbytes(),
+        }
+
+    def save(self):
+        if self.path is None or self.codes is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(self.exact, np.memmap):
+            self.exact.flush()
+        arrays = {
+            "ids": np.array(self.ids, dtype=object),
+            "codes": self.codes,
+            "full_dim": np.array(self.full_dim),
+            "pca_fit_rows": np.array(self.pca_fit_rows),
+        }
+        for name in ("scales", "mean", "components"):
+            value = getattr(self, name)
+            if value is not None:
+                arrays[name] = value
+        with open(self.path, "wb") as f:
+            np.savez(f, **arrays)
+        logger.info(f"Saved compressed index ({self.mode}, {len(self.ids)} vectors) to {self.path}")
+
+    def load(self) -> bool:
+        """
+        Загрузить индекс с диска; False, если файлов нет, они от другого режима/размерности
+        или файл точных векторов не совпадает с индексом по числу строк.
+        """
+        if self.path is None or not self.path.exists() or not self.exact_path.exists():
+            return False
+        data = np.load(self.path, allow_pickle=True)
+        self.ids = data["ids"].tolist()
+        self._rows = {id_val: row for row, id_val in enumerate(self.ids)}
+        self.codes = data["codes"]
+        self.full_dim = int(data["full_dim"])
+        self.pca_fit_rows = int(data["pca_fit_rows"]) if "pca_fit_rows" in data else 0
+        self.scales = data["scales"] if "scales" in data else None
+        self.mean = data["mean"] if "mean" in data else None
+        self.components = data["components"] if "components" in data else None
+        if self.mode in ("truncate", "pca") and self.codes.shape[1] != self.dim:
+            logger.info(f"Compressed index dim {self.codes.shape[1]} != {self.dim}, rebuilding")
+            self.reset()
+            return False
+        self._open_exact()
+        if len(self.exact) != len(self.ids):
+            logger.info(f"Exact vectors file has {len(self.exact)} rows, index has {len(self.ids)}, rebuilding")
+            self.reset()
+            return False
+        logger.info(f"Loaded compressed index ({self.mode}, {len(self.ids)} vectors)")
+        return True
+
+    def reset(self):
+        self.ids = []
+        self._rows = {}
+        self.codes = self.scales = self.mean = self.components = None
+        self.exact = None
+        self.full_dim = 0
+        self.pca_fit_rows = 0
+        for path in (self.path, self.exact_path):
+            if path is not None and path.exists():
+                path.unlink()
@@ -71,6 +71,8 @@ if prompt := st.chat_input("Задайте вопрос по конспекта
                         footer = "Ответ основан на конспектах лекций."
                     elif mode == "internet":
                         footer = "Ответ основан на интернет-материалах (поисковый модуль)."
+                    elif mode == "citations_only":
+                        footer = "LLM не ответил вовремя - показаны только найденные фрагменты конспектов."
                     else:
                         footer = ""
 